@@ -35,7 +35,7 @@ def _summarize_requirements(products):
 
     # Get requirements and work out what uses them
     for product in products:
-        for req in product.requirements():
+        for req, _ in product.requirements():
             packages[req.normalized_name] = req
             usages[req.normalized_name].add(product.code)
 
@@ -5,6 +5,7 @@ To run:
  * tox -e tests --run-command "python bin/graph_dependencies.py"
 """
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 from dev.deps.graph import Graph
 from dev.deps.tree import DepTree, TreeProcessing
@@ -55,10 +56,13 @@ if __name__ == "__main__":
     # Ensure our output dirs exist
     os.makedirs(CHECKOUT_DIR, exist_ok=True)
 
-    for lib in Library.get_all():
-        _graph_lib(lib)
+    # Each graph is independent of the others, so we can make them in parallel
+    with ProcessPoolExecutor() as executor:
+        lib_results = executor.map(_graph_lib, Library.get_all())
+        app_results = executor.map(_graph_app, Application.get_all())
 
-    for app in Application.get_all():
-        _graph_app(app)
+        # Consume the results so any errors are raised here
+        list(lib_results)
+        list(app_results)
 
     print(f"\nGenerated graphs in {OUTPUT_DIR}")
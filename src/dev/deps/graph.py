@@ -1,7 +1,7 @@
 """Methods for generating graphs from dependency tree data."""
 
+from functools import lru_cache
 from subprocess import check_output
-from tempfile import NamedTemporaryFile
 
 from jinja2 import Template
 from pkg_resources import resource_string
@@ -20,11 +20,11 @@ class Graph:
         :param output_file: Target file to create PNG
         :param algo: One of: `dot`, `neato`, `fdp`, `sfdp`, `circo`, `twopi`
         """
-        with NamedTemporaryFile() as dot_file:
-            dot_file.write(cls.create_dot(tree_data).encode("utf-8"))
-            dot_file.flush()
-
-            check_output([algo, "-Tpng", "-o", output_file, dot_file.name])
+        # Graphviz reads from stdin if no file is given
+        check_output(
+            [algo, "-Tpng", "-o", output_file],
+            input=cls.create_dot(tree_data).encode("utf-8"),
+        )
 
     _TEMPLATE = Template(
         resource_string("dev", "templates/dependency_graph.dot.jinja2").decode("utf-8")
@@ -54,22 +54,29 @@ class Graph:
 
         return package["python_versions"][-1]
 
-    _VERSION_COLOR_MAP = {
-        "3.9": "green",
-        "3.8": "greenyellow",
-        "3.7": "yellow",
-        "3.6": "orange",
-    }
-
     @classmethod
     def _color_for(cls, package):
-        versions = package["python_versions"]
+        return _color_for(package["normalized_name"], package["python_versions_set"])
+
+
+# The colors to use for packages, by the highest Python version they support
+_VERSION_COLORS = (
+    ("3.9", "green"),
+    ("3.8", "greenyellow"),
+    ("3.7", "yellow"),
+    ("3.6", "orange"),
+)
+
 
-        if package["normalized_name"] in OUR_LIBS:
-            return "darkslategray1"
+@lru_cache(1024)
+def _color_for(normalized_name, python_versions):
+    # This is called for every package in every graph we render, and the same
+    # packages appear in many of them
+    if normalized_name in OUR_LIBS:
+        return "darkslategray1"
 
-        for key, color in cls._VERSION_COLOR_MAP.items():
-            if key in versions:
-                return color
+    for key, color in _VERSION_COLORS:
+        if key in python_versions:
+            return color
 
-        return "red"
+    return "red"
@@ -1,24 +1,49 @@
 """Methods for discovering information about packages."""
 
-import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property, lru_cache
+from itertools import chain
 
 import requests
+import simdjson
 from diskcache import Cache
 from packaging.markers import default_environment
 from packaging.requirements import Requirement
 from packaging.version import parse as parse_version
-from pkg_resources import resource_filename, resource_stream
+from pkg_resources import resource_filename
+from requests.adapters import HTTPAdapter
+
+from dev.resources import load_json
 
 # Info we've gathered manually
-PACKAGE_INFO = json.load(resource_stream("dev", "resources/packages.json"))
+PACKAGE_INFO = load_json("resources/packages.json")
+
+# The environment we evaluate requirement markers against. This won't change
+# while we are running, so there's no need to work it out more than once
+_DEFAULT_ENV = default_environment()
 
 
+@lru_cache(4096)
 def normalized_name(name):
     """Get a normalized version of a package name for comparison."""
 
-    return name.lower().replace("-", "_").strip()
+    name = name.strip().lower()
+
+    # Most names we see are already normalized, so avoid copying them again
+    if "-" not in name:
+        return name
+
+    return name.replace("-", "_")
+
+
+def _pooled_session(pool_size):
+    session = requests.Session()
+    session.mount(
+        "https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    )
+
+    return session
 
 
 class PyPIAPI:
@@ -26,26 +51,83 @@ class PyPIAPI:
 
     # pylint: disable=too-few-public-methods
 
+    MAX_WORKERS = 16
+    """The maximum number of concurrent requests to make in `prefetch()`."""
+
     _cache = Cache(resource_filename("dev", "resources/pypi_cache"))
 
+    # Share connections between requests, rather than paying for a new
+    # connection to PyPI every time
+    _session = _pooled_session(pool_size=MAX_WORKERS * 2)
+
     """Interface to the PyPI JSON API for getting data about packages."""
 
     def get(self, project_name):
-        """Get details of a specific package."""
+        """Get details of a specific package.
+
+        To keep things small we only return the parts of the PyPI data we use:
+
+         * `classifiers` - The classifiers from the package info
+         * `requires_dist` - The requirements from the package info
+         * `latest_release` - The files of the latest release
+
+        :param project_name: The name of the package to get
+        :return: A dict of details
+        """
         return self._get(normalized_name(project_name))
 
+    def prefetch(self, project_names):
+        """Fetch the details of many packages concurrently.
+
+        This populates the cache, so that later calls to `get()` for these
+        packages don't have to wait for PyPI one at a time.
+
+        :param project_names: An iterable of package names to get
+        """
+        names = {normalized_name(project_name) for project_name in project_names}
+        if not names:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            # Consume the results so any errors are raised here
+            list(executor.map(self._get, names))
+
     @lru_cache(1024)
-    @_cache.memoize()
+    # Change this name if the shape of the data returned changes, so we don't
+    # read stale values from the disk cache
+    @_cache.memoize(name="dev.deps.package.PyPIAPI._get_summary")
     # This is quite slow without the caching above. Both in memory and disk
     # help quite a bit
     # pylint: disable=no-self-use
     # I can't get `diskcache` to work on a class method
     def _get(self, name):
         print(f"Getting details from PyPI for: {name}")
-        response = requests.get(f"https://pypi.org/pypi/{name}/json")
+        response = self._session.get(f"https://pypi.org/pypi/{name}/json")
         response.raise_for_status()
 
-        return response.json()
+        # The PyPI responses can be quite large, so we use `simdjson` to pick
+        # out only the parts we need without converting the whole document
+        # into Python objects. We must return plain Python values here, so
+        # `diskcache` can pickle them.
+        parser = simdjson.Parser()
+        doc = parser.parse(response.content)
+        releases = doc["releases"]
+
+        return {
+            "classifiers": list(doc.at_pointer("/info/classifiers")),
+            "requires_dist": list(doc.at_pointer("/info/requires_dist") or []),
+            "latest_release": [
+                {"python_version": dist["python_version"]}
+                for dist in releases[self._latest_version(releases.keys())]
+            ],
+        }
+
+    @staticmethod
+    def _latest_version(versions):
+        # Something in requests or JSON parsing is discarding the order given
+        # to us by PyPI. This means the versions end up sorted in lexical order
+        # so  1.1, 1.10, 1.9 ...
+        return max(versions, key=parse_version)
 
 
 class Package(Requirement):
@@ -54,15 +136,53 @@ class Package(Requirement):
     pypi_api = PyPIAPI()
 
     def __init__(self, *args, **kwargs):
-        self.requirement_types = set()
         super().__init__(*args, **kwargs)
 
         self.normalized_name = normalized_name(self.name)
 
-        data = self.pypi_api.get(self.name)
+    @classmethod
+    @lru_cache(4096)
+    # The same packages turn up again and again in different products and
+    # trees, and each one has to work out its requirements and versions. So
+    # we share them, which means nothing specific to one use of a package
+    # should be stored on it.
+    def create(cls, requirement_string):
+        """Get a package for a requirement string, reusing any made before.
+
+        :param requirement_string: A requirement like "requests>=2.0"
+        :return: A `Package` object
+        """
+        return cls(requirement_string)
+
+    @classmethod
+    def prefetch(cls, packages):
+        """Get PyPI details for many packages at once.
+
+        Packages only contact PyPI when their details are first needed, so
+        calling this first lets us fetch them concurrently instead.
+
+        :param packages: An iterable of `Package` objects
+        """
+        cls.pypi_api.prefetch(package.name for package in packages)
 
-        self.info = data["info"]
-        self.releases = data["releases"]
+    @cached_property
+    def _pypi_data(self):
+        return self.pypi_api.get(self.name)
+
+    @property
+    def classifiers(self):
+        """Get the classifiers declared by this package."""
+        return self._pypi_data["classifiers"]
+
+    @property
+    def requires_dist(self):
+        """Get the raw requirement strings declared by this package."""
+        return self._pypi_data["requires_dist"]
+
+    @property
+    def latest_release(self):
+        """Get the files of the latest release of this package."""
+        return self._pypi_data["latest_release"]
 
     @cached_property
     def requirements(self):
@@ -71,77 +191,58 @@ class Package(Requirement):
 
     def get_requirements(self, req_type=None):
         """Get specific types of requirements (like "tests")."""
-        requires = self.info["requires_dist"]
-
-        if not requires:
+        if not self.requires_dist:
             return []
 
-        env = default_environment()
+        env = _DEFAULT_ENV.copy()
         env["extra"] = req_type
 
         reqs = []
-        for item in requires:
-            req = Package(item)
+        for item in self.requires_dist:
+            req = Package.create(item)
             if req.marker is None or req.marker.evaluate(env):
                 reqs.append(req)
 
+        self.prefetch(reqs)
+
         return reqs
 
+    _CLASSIFIER_REGEX = re.compile(
+        r"^Programming Language :: Python :: (\d+(?:\.\d+)*)$"
+    )
     _PYTHON_CODE_REGEX = re.compile(r"^cp(\d\d)$")
 
-    @property
-    def latest_release(self):
-        """Get details of the latest release of this package."""
-
-        # Something in requests or JSON parsing is discarding the order given
-        # to us by PyPI. This means the versions end up sorted in lexical order
-        # so  1.1, 1.10, 1.9 ...
-
-        last_version = sorted([parse_version(ver) for ver in self.releases.keys()])[-1]
-
-        return self.releases[str(last_version)]
-
     @cached_property
     def python_versions(self):
         """Get the supported python versions."""
 
-        versions = set()
-
-        versions.update(self.declared_versions())
-        versions.update(self.implied_versions())
-        versions.update(self.known_versions())
-
-        return list(sorted(versions))
+        return sorted(
+            set(
+                chain(
+                    self.declared_versions(),
+                    self.implied_versions(),
+                    self.known_versions(),
+                )
+            )
+        )
 
     @cached_property
     def undeclared_versions(self):
         """Get a list of inferred (but not declared) versions."""
 
-        versions = set(self.python_versions)
-        versions -= set(self.declared_versions())
+        declared = set(self.declared_versions())
 
-        return list(sorted(versions))
+        # `python_versions` is already sorted, so there's no need to sort again
+        return [version for version in self.python_versions if version not in declared]
 
     def declared_versions(self):
         """Get version information from the declared classifiers."""
 
-        for classifier in self.info["classifiers"]:
-            parts = classifier.split(" :: ")
-
-            if len(parts) != 3:
-                continue
-
-            if parts[0] != "Programming Language" or parts[1] != "Python":
-                continue
-
-            python_version = parts[2]
-
-            version = parse_version(python_version)
-
-            # This will parse any old string, but only numbered versions have a
-            # "release" which is a tuple like (3, 6).
-            if version.release:
-                yield version
+        for classifier in self.classifiers:
+            # Only numbered versions like "3.6" match here, so we skip things
+            # like "Programming Language :: Python :: 3 :: Only"
+            if match := self._CLASSIFIER_REGEX.match(classifier):
+                yield parse_version(match.group(1))
 
     def implied_versions(self):
         """Get version information based on the compiled wheels."""
@@ -160,9 +261,14 @@ class Package(Requirement):
     def serialize(self):
         """Represent this package as a dict."""
 
+        python_versions = [str(v) for v in self.python_versions]
+
         return {
             "name": self.name,
             "normalized_name": self.normalized_name,
-            "python_versions": [str(v) for v in self.python_versions],
+            # In order, lowest version first
+            "python_versions": python_versions,
+            # The same versions, but quick to check membership in
+            "python_versions_set": frozenset(python_versions),
             "undeclared_versions": [str(v) for v in self.undeclared_versions],
         }
@@ -1,6 +1,7 @@
 """Methods for parsing Python requirements files."""
 
 import os
+import re
 from functools import cached_property
 
 from dev.deps.package import Package
@@ -15,21 +16,22 @@ class RequirementsFile:
         self.filename = filename
         self.type = os.path.basename(filename).replace(".in", "")
 
+    # Lines which aren't blank, comments or options like `-r other.txt`. This
+    # captures everything up to any trailing comment.
+    _REQUIREMENT_REGEX = re.compile(r"^[ \t]*([^-#\s][^#\n]*)", re.MULTILINE)
+
     @cached_property
     def requirements(self):
         """Yield all requirements as Package objects."""
 
-        requirements = []
-
         with open(self.filename) as handle:
-            for line in handle:
-                line = line.strip()
-                if line.startswith("#") or line.startswith("-r") or not line:
-                    continue
+            content = handle.read()
 
-                if "#" in line:
-                    line = line[: line.index("#")]
+        requirements = [
+            Package.create(match.group(1).strip())
+            for match in self._REQUIREMENT_REGEX.finditer(content)
+        ]
 
-                requirements.append(Package(line))
+        Package.prefetch(requirements)
 
         return requirements
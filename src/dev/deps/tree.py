@@ -1,5 +1,7 @@
 """Methods for generating dependency trees."""
 
+from collections import Counter, deque
+
 from dev.models.product import OUR_LIBS
 
 
@@ -10,10 +12,19 @@ class DepTree:
     def for_product(cls, product):
         """Create a tree from a Product object."""
 
-        return cls(product, children=[DepTree(req) for req in product.requirements()])
+        return cls(
+            product,
+            children=[
+                DepTree(req, requirement_types=req_types)
+                for req, req_types in product.requirements()
+            ],
+        )
 
-    def __init__(self, package, children=None):
+    def __init__(self, package, children=None, requirement_types=None):
         self.package = package
+        # How the parent requires this package, like "dist" or "tests". We only
+        # know this for the direct requirements of a product.
+        self.requirement_types = requirement_types or set()
         if children is None:
             children = [DepTree(req) for req in package.requirements]
 
@@ -25,21 +36,28 @@ class DepTree:
         if seen_before is None:
             seen_before = set()
 
-        for child in self.children:
-            name = child.package.normalized_name
-            if name in seen_before:
-                continue
-
-            seen_before.add(name)
-            yield child
-            yield from child.unique_children(seen_before)
+        # This is a depth first walk of the tree, but with our own stack of
+        # iterators rather than recursion which is slow and can hit limits
+        stack = [iter(self.children)]
+        while stack:
+            for child in stack[-1]:
+                name = child.package.normalized_name
+                if name in seen_before:
+                    continue
+
+                seen_before.add(name)
+                yield child
+                stack.append(iter(child.children))
+                break
+            else:
+                stack.pop()
 
     def serialize(self):
         """Represent the tree as a nested dict."""
 
         root = self.package.serialize()
         root["dependencies"] = {
-            node.package.normalized_name: list(node.package.requirement_types)
+            node.package.normalized_name: list(node.requirement_types)
             for node in self.children
         }
 
@@ -84,13 +102,18 @@ class TreeProcessing:
     @classmethod
     def prune_specified(cls, tree_data, prune):
         """Get rid of the specified dependencies."""
+
+        # We check every dependency against this, so make sure it's quick
+        prune = frozenset(prune)
+
         for package_data in tree_data["packages"].values():
             package_data["dependencies"] = [
                 dep for dep in package_data["dependencies"] if dep not in prune
             ]
 
-        for name in prune:
-            tree_data["root"]["dependencies"].pop(name, None)
+        root_dependencies = tree_data["root"]["dependencies"]
+        for name in prune & root_dependencies.keys():
+            root_dependencies.pop(name)
 
     @classmethod
     def prune_our_lib_dependencies(cls, tree_data):
@@ -106,7 +129,7 @@ class TreeProcessing:
 
         prune = []
         for name in tree_data["root"]["dependencies"].keys():
-            if required_version in tree_data["packages"][name]["python_versions"]:
+            if required_version in tree_data["packages"][name]["python_versions_set"]:
                 prune.append(name)
 
         for name in prune:
@@ -117,25 +140,25 @@ class TreeProcessing:
         """Don't list dependencies of things which the required version."""
 
         for package_data in tree_data["packages"].values():
-            if required_version in package_data["python_versions"]:
+            if required_version in package_data["python_versions_set"]:
                 package_data["dependencies"] = []
 
     @classmethod
     def prune_unreferenced_dependencies(cls, tree_data):
         """Remove anything from the graph that is not referenced."""
 
-        referenced = set(tree_data["root"]["dependencies"].keys())
-        packages = set()
+        packages = tree_data["packages"]
 
-        for package_name, package_data in tree_data["packages"].items():
-            packages.add(package_name)
-            referenced.update(package_data["dependencies"])
+        # Count how many times each package is referenced, so we can tell
+        # when removing a package leaves its dependencies unreferenced
+        ref_counts = Counter(tree_data["root"]["dependencies"].keys())
+        for package_data in packages.values():
+            ref_counts.update(package_data["dependencies"])
 
-        unreferenced = packages - referenced
-        ref_by_unref = set()
-        for package_name in unreferenced:
-            ref_by_unref.update(tree_data["packages"][package_name]["dependencies"])
-            tree_data["packages"].pop(package_name)
+        unreferenced = deque(name for name in packages if not ref_counts[name])
+        while unreferenced:
+            for dependency in packages.pop(unreferenced.popleft())["dependencies"]:
+                ref_counts[dependency] -= 1
 
-        if ref_by_unref:
-            cls.prune_unreferenced_dependencies(tree_data)
+                if not ref_counts[dependency] and dependency in packages:
+                    unreferenced.append(dependency)
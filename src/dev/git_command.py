@@ -10,6 +10,10 @@ class Git:
 
     @classmethod
     def clone(cls, git_url, target_dir):
-        """Clone a project from a git URL into a directory."""
+        """Clone a project from a git URL into a directory.
 
-        check_output(["git", "clone", git_url, target_dir])
+        This is a shallow clone of the default branch, as we only need the
+        current files and not the history.
+        """
+
+        check_output(["git", "clone", "--depth=1", git_url, target_dir])
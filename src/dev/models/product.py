@@ -1,14 +1,14 @@
 """Representations of our libraries and applications."""
 
-import json
 import os
+from collections import defaultdict
+from functools import lru_cache
 from glob import glob
 
-from pkg_resources import resource_stream
-
 from dev.deps.package import Package
 from dev.deps.requirements_file import RequirementsFile
 from dev.git_command import Git
+from dev.resources import load_json
 
 
 class Product:
@@ -60,27 +60,37 @@ class Product:
     def get_all(cls):
         """Iterate through all products."""
 
-        for product_code in cls._DATA:
-            yield cls.get(product_code)
+        yield from cls._get_all()
+
+    @classmethod
+    @lru_cache(None)
+    # `_DATA` is different for each subclass, and the class is part of the
+    # cache key, so this is safe to share between them
+    def _get_all(cls):
+        return tuple(cls.get(product_code) for product_code in cls._DATA)
 
 
 class Application(Product):
     """A Hypothesis application."""
 
-    _DATA = json.load(resource_stream("dev", "resources/products.json"))
+    _DATA = load_json("resources/products.json")
 
     def requirements(self):
-        """Get the requirements of the application marked with type."""
+        """Get the requirements of the application marked with type.
+
+        :return: A list of tuples of `Package` and a set of requirement types
+        """
 
         requirements = {}
+        requirement_types = defaultdict(set)
 
         for req_file in self._requirements_files():
             for req in req_file.requirements:
                 name = req.normalized_name
-                req = requirements.setdefault(name, req)
-                req.requirement_types.add(req_file.type)
+                requirements.setdefault(name, req)
+                requirement_types[name].add(req_file.type)
 
-        return requirements.values()
+        return [(req, requirement_types[name]) for name, req in requirements.items()]
 
     def _requirements_files(self):
         return [
@@ -92,30 +102,34 @@ class Application(Product):
 class Library(Product):
     """A Hypothesis library."""
 
-    _DATA = json.load(resource_stream("dev", "resources/libraries.json"))
+    _DATA = load_json("resources/libraries.json")
 
     def __init__(self, *args, on_pypi=True, **kwargs):
         super().__init__(*args, **kwargs)
         self.on_pypi = on_pypi
 
     def requirements(self):
-        """Get the requirements of the library marked with type."""
-        package = Package(self.code)
+        """Get the requirements of the library marked with type.
+
+        :return: A list of tuples of `Package` and a set of requirement types
+        """
+        package = Package.create(self.code)
 
         requirements = {}
+        requirement_types = defaultdict(set)
 
         for req_type, extra in (("dist", None), ("tests", "tests")):
             for req in package.get_requirements(extra):
                 name = req.normalized_name
-                req = requirements.setdefault(name, req)
-                req.requirement_types.add(req_type)
+                requirements.setdefault(name, req)
+                requirement_types[name].add(req_type)
 
         # Don't list the main dependencies again in our test deps etc.
-        for req in requirements.values():
-            if "dist" in req.requirement_types:
-                req.requirement_types = {"dist"}
+        for name, req_types in requirement_types.items():
+            if "dist" in req_types:
+                requirement_types[name] = {"dist"}
 
-        return requirements.values()
+        return [(req, requirement_types[name]) for name, req in requirements.items()]
 
 
 OUR_LIBS = set(lib.code for lib in Library.get_all())
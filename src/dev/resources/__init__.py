@@ -0,0 +1,20 @@
+"""Data files shipped with `dev` and helpers for reading them."""
+
+from pkg_resources import resource_string
+
+try:
+    # `orjson` is much faster at parsing than the standard library, but we
+    # don't require it
+    import orjson as _json
+except ImportError:  # pragma: no cover
+    import json as _json
+
+
+def load_json(resource_name):
+    """Load a JSON resource file from the `dev` package.
+
+    :param resource_name: Path to the file like "resources/products.json"
+    :return: The parsed contents of the file
+    """
+    # Both `orjson` and `json` will happily accept bytes
+    return _json.loads(resource_string("dev", resource_name))